@@ -4,113 +4,479 @@ optionally fetch an AI texture from a local Stable Diffusion API, assign a
 Principled shader, and save the scene.
 
 Run with:
-  hython scripts/generate_interstellar_ship.py
+  hython scripts/generate_interstellar_ship.py [--quality fast|std|high]
+
+The SD helpers (e.g. call_sd_batch) can also be imported as
+scripts.generate_interstellar_ship with the project root on sys.path.
 """
 
 from __future__ import annotations
 
+import argparse
+import asyncio
+import binascii
+import concurrent.futures
+import functools
+import hashlib
+import importlib
+import importlib.util
+import json
 import os
+import shutil
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Literal, Optional, Sequence, Tuple
 
+# Importable as scripts.generate_interstellar_ship from the project root, or run
+# directly with hython, which puts scripts/ itself on sys.path
+try:
+    from scripts.setup_houdini_ai import batched_edits, save_hip_atomic, set_inputs
+except ImportError:
+    from setup_houdini_ai import batched_edits, save_hip_atomic, set_inputs
 
-def _safe_requests():
-    try:
-        import requests  # type: ignore
-        return requests
-    except Exception:
-        return None
+try:
+    import hou  # type: ignore
+except ImportError:  # only importable inside hython; main() reports it
+    hou = None
 
 
-def call_sd_txt2img(prompt: str, out_path: Path, api_url: str = "http://127.0.0.1:7860") -> bool:
-    """Best-effort call to Automatic1111 txt2img API and write a PNG.
-    Returns True on success, False otherwise.
-    """
-    requests = _safe_requests()
-    if requests is None:
-        print("[Interstellar] 'requests' not available; skipping SD texture.")
-        return False
+class _Lazy:
+    """Module proxy that imports ``name`` on first attribute access and keeps it."""
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._mod = None
+
+    def __getattr__(self, attr: str):
+        if self._mod is None:
+            self._mod = importlib.import_module(self._name)
+        return getattr(self._mod, attr)
+
+
+@functools.lru_cache(maxsize=None)
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def _has_requests() -> bool:
+    return _has_module("requests")
+
+
+# Heavy optional modules are imported only when first used, so a scene build
+# that never talks to SD does not pay for requests/urllib3/ssl at startup.
+requests = _Lazy("requests")
+aiohttp = _Lazy("aiohttp")
+ijson = _Lazy("ijson")
+orjson = _Lazy("orjson")
+
+_SESSION = None
+
+# Resolved once; INTERSTELLAR_ROOT overrides the working directory
+_PROJECT_ROOT = Path(os.environ.get("INTERSTELLAR_ROOT") or os.getcwd()).resolve()
+_TEX_DIR = _PROJECT_ROOT / "ai_tools" / "generated"
+_HIP_DIR = _PROJECT_ROOT / "houdini"
+
+
+def _sd_session():
+    """Return the shared SD session, creating it on first use."""
+    global _SESSION
+    if _SESSION is None:
+        from urllib3.util import Retry  # type: ignore
+
+        # Keep-alive pool so consecutive texture calls reuse the same socket
+        # POST is not idempotent here: a read timeout means the server may still be
+        # generating, so only connect failures and gateway errors are retried
+        retry = Retry(
+            total=3,
+            read=0,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"POST"}),
+        )
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        _SESSION = session
+    return _SESSION
+
+
+# Pixel budget per txt2img request; keeps batches within typical consumer VRAM
+_MAX_BATCH_PIXELS = 4 * 1024 * 1024
+_MAX_BATCH = 8
 
-    payload = {
+
+Quality = Literal["fast", "std", "high"]
+
+# (steps, square size) per quality level; hull textures tile, so 768² is plenty by default
+_QUALITY_PRESETS: Dict[str, Tuple[int, int]] = {
+    "fast": (15, 512),
+    "std": (20, 768),
+    "high": (25, 1024),
+}
+
+
+# Base64 characters decoded per write; a multiple of 4 so every slice decodes on its own
+_B64_CHUNK = 64 * 1024
+
+
+def _txt2img_payload(prompt: str, quality: Quality = "std") -> dict:
+    steps, size = _QUALITY_PRESETS[quality]
+    return {
         "prompt": prompt,
-        "steps": 20,
+        "steps": steps,
         "cfg_scale": 7.0,
-        "sampler_name": "Euler a",
-        "width": 1024,
-        "height": 1024,
+        "sampler_name": "DPM++ 2M Karras",
+        "width": size,
+        "height": size,
     }
+
+
+def _max_batch_size(payload: dict) -> int:
+    """Largest CUDA-safe batch for the payload size: 4 images at 1024², 8 at 512²."""
+    pixels = payload["width"] * payload["height"]
+    return max(1, min(_MAX_BATCH, _MAX_BATCH_PIXELS // pixels))
+
+
+def _loads(raw: bytes):
+    """Parse a JSON body with orjson when installed, else the stdlib parser."""
+    if _has_module("orjson"):
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _iter_images(resp) -> Iterable[str]:
+    """Yield base64 images from a streamed SD response.
+
+    With ijson the body is parsed incrementally from the socket; otherwise the
+    whole JSON document is loaded at once.
+    """
+    if not _has_module("ijson"):
+        yield from _loads(resp.content).get("images") or []
+        return
+    resp.raw.decode_content = True
+    yield from ijson.items(resp.raw, "images.item")
+
+
+def _write_all(fd: int, buf: bytes) -> None:
+    view = memoryview(buf)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _write_b64(img_b64: str, out_path: Path) -> None:
+    """Decode img_b64 straight into out_path in _B64_CHUNK slices.
+
+    The decoded length is known up front, so the file is preallocated where the
+    platform supports it.
+    """
+    size = len(img_b64) // 4 * 3 - img_b64[-2:].count("=")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(out_path, flags, 0o644)
     try:
-        resp = requests.post(api_url.rstrip("/") + "/sdapi/v1/txt2img", json=payload, timeout=180)
-        resp.raise_for_status()
-        data = resp.json()
+        if size > 0 and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except OSError:
+                pass  # e.g. filesystems without fallocate support
+        for start in range(0, len(img_b64), _B64_CHUNK):
+            _write_all(fd, binascii.a2b_base64(img_b64[start : start + _B64_CHUNK]))
+    finally:
+        os.close(fd)
+
+
+@functools.lru_cache(maxsize=None)
+def _ensure_tex_dir() -> None:
+    """Create the texture output directory once per session."""
+    _TEX_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def _cache_path(prompt: str, quality: Quality, variant: int) -> Path:
+    """Content-addressed cache file for one generated image.
+
+    variant distinguishes repeated requests for the same prompt within a batch.
+    """
+    key_src = json.dumps({**_txt2img_payload(prompt, quality), "variant": variant}, sort_keys=True)
+    key = hashlib.blake2b(key_src.encode("utf-8"), digest_size=16).hexdigest()
+    return _TEX_DIR / f"{key}.png"
+
+
+def _variants(prompts: Sequence[str]) -> List[int]:
+    seen: Dict[str, int] = {}
+    out = []
+    for prompt in prompts:
+        seen[prompt] = seen.get(prompt, -1) + 1
+        out.append(seen[prompt])
+    return out
+
+
+def _is_cached(cache_file: Path) -> bool:
+    try:
+        return cache_file.stat().st_size > 0
+    except OSError:
+        return False
+
+
+def _publish(cache_file: Path, out_path: Path) -> None:
+    """Expose a cached image at out_path, hard-linking when the filesystem allows it."""
+    if out_path == cache_file:
+        return
+    try:
+        out_path.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(cache_file, out_path)
+    except OSError:
+        shutil.copyfile(cache_file, out_path)
+
+
+def _store(img_b64: str, cache_file: Path, out_path: Path) -> None:
+    part = cache_file.with_suffix(".part")
+    _write_b64(img_b64, part)
+    os.replace(part, cache_file)
+    _publish(cache_file, out_path)
+    print(f"[Interstellar] Wrote AI texture: {out_path}")
+
+
+def _txt2img_request(
+    prompt: str, targets: List[Tuple[Path, Path]], api_url: str, quality: Quality
+) -> List[bool]:
+    """POST one batch for prompt; targets holds (out_path, cache_file) per image."""
+    payload = _txt2img_payload(prompt, quality)
+    payload["batch_size"] = len(targets)
+    results = [False] * len(targets)
+    try:
+        written = 0
+        with _sd_session().post(
+            api_url.rstrip("/") + "/sdapi/v1/txt2img", json=payload, timeout=(5, 180), stream=True
+        ) as resp:
+            resp.raise_for_status()
+            for (out_path, cache_file), img_b64 in zip(targets, _iter_images(resp)):
+                _store(img_b64, cache_file, out_path)
+                results[written] = True
+                written += 1
+        if not written:
+            print("[Interstellar] SD returned no images; skipping.")
+        elif written < len(targets):
+            print(f"[Interstellar] SD returned {written} of {len(targets)} images.")
+    except Exception as exc:
+        print(f"[Interstellar] SD txt2img failed: {exc}")
+    return results
+
+
+def _txt2img_many(
+    prompts: Sequence[str], out_paths: Sequence[Path], api_url: str, quality: Quality
+) -> List[bool]:
+    if len(prompts) != len(out_paths):
+        raise ValueError("prompts and out_paths must have the same length")
+    _ensure_tex_dir()
+
+    results = [False] * len(prompts)
+    pending: Dict[str, List[Tuple[int, Path, Path]]] = {}
+    for idx, (prompt, out_path, variant) in enumerate(zip(prompts, out_paths, _variants(prompts))):
+        cache_file = _cache_path(prompt, quality, variant)
+        if _is_cached(cache_file):
+            _publish(cache_file, out_path)
+            print(f"[Interstellar] Reused cached AI texture: {out_path}")
+            results[idx] = True
+        else:
+            pending.setdefault(prompt, []).append((idx, out_path, cache_file))
+    if not pending:
+        return results
+    if not _has_requests():
+        print("[Interstellar] 'requests' not available; skipping SD texture.")
+        return results
+
+    limit = _max_batch_size(_txt2img_payload("", quality))
+    for prompt, items in pending.items():
+        for start in range(0, len(items), limit):
+            chunk = items[start : start + limit]
+            written = _txt2img_request(prompt, [(o, c) for _, o, c in chunk], api_url, quality)
+            for (idx, _, _), ok in zip(chunk, written):
+                results[idx] = ok
+    return results
+
+
+def call_sd_txt2img(
+    prompts: Sequence[str],
+    out_paths: Sequence[Path],
+    api_url: str = "http://127.0.0.1:7860",
+    quality: Quality = "std",
+) -> bool:
+    """Best-effort call to Automatic1111 txt2img API, writing one PNG per prompt.
+
+    Images already in the content-addressed cache under ai_tools/generated are
+    reused without an HTTP call. Identical prompts share a single request
+    (``batch_size`` images, one seed each); distinct prompts go out as separate
+    requests over the pooled session.
+    Returns True when every image was written, False otherwise.
+    """
+    return all(_txt2img_many(prompts, out_paths, api_url, quality))
+
+
+async def call_sd_txt2img_async(
+    session,
+    prompt: str,
+    out_path: Path,
+    api_url: str = "http://127.0.0.1:7860",
+    quality: Quality = "std",
+    variant: int = 0,
+) -> bool:
+    """Coroutine variant of call_sd_txt2img using a shared aiohttp session.
+    Returns True on success, False otherwise.
+    """
+    _ensure_tex_dir()
+    cache_file = _cache_path(prompt, quality, variant)
+    if _is_cached(cache_file):
+        _publish(cache_file, out_path)
+        print(f"[Interstellar] Reused cached AI texture: {out_path}")
+        return True
+
+    payload = _txt2img_payload(prompt, quality)
+    try:
+        async with session.post(api_url.rstrip("/") + "/sdapi/v1/txt2img", json=payload) as resp:
+            resp.raise_for_status()
+            data = _loads(await resp.read())
         images = data.get("images") or []
         if not images:
             print("[Interstellar] SD returned no images; skipping.")
             return False
-        import base64  # lazy import
 
-        img_b64 = images[0]
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        out_path.write_bytes(base64.b64decode(img_b64))
-        print(f"[Interstellar] Wrote AI texture: {out_path}")
+        # Decode off the event loop so other in-flight requests keep progressing
+        await asyncio.to_thread(_store, images[0], cache_file, out_path)
         return True
     except Exception as exc:
         print(f"[Interstellar] SD txt2img failed: {exc}")
         return False
 
 
+async def _gather_sd(jobs: List[Tuple[str, Path]], api_url: str, quality: Quality) -> List[bool]:
+    connector = aiohttp.TCPConnector(limit=4)
+    timeout = aiohttp.ClientTimeout(total=None, connect=5, sock_read=180)
+    variants = _variants([prompt for prompt, _ in jobs])
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        return list(
+            await asyncio.gather(
+                *[
+                    call_sd_txt2img_async(session, prompt, out_path, api_url, quality, variant)
+                    for (prompt, out_path), variant in zip(jobs, variants)
+                ]
+            )
+        )
+
+
+def call_sd_batch(
+    prompts_and_paths: Iterable[Tuple[str, Path]],
+    api_url: str = "http://127.0.0.1:7860",
+    quality: Quality = "std",
+) -> List[bool]:
+    """Generate several textures concurrently, one (prompt, out_path) pair per image.
+    Falls back to the batched synchronous path when aiohttp is not installed.
+    """
+    jobs = list(prompts_and_paths)
+    if not jobs:
+        return []
+    if not _has_module("aiohttp"):
+        print("[Interstellar] 'aiohttp' not available; running SD calls sequentially.")
+        prompts, out_paths = zip(*jobs)
+        return _txt2img_many(prompts, out_paths, api_url, quality)
+    return asyncio.run(_gather_sd(jobs, api_url, quality))
+
+
+# Built-in primitive SOPs whose parms are all set explicitly; HDAs such as the
+# principled shader need their init scripts and contents, so they are created normally
+_BARE_TYPES = frozenset({"tube", "cone", "sphere", "torus", "merge"})
+
+
 def get_or_create(parent, type_name: str, node_name: str):
     node = parent.node(node_name)
     if node is None:
-        node = parent.createNode(type_name, node_name=node_name)
+        if type_name in _BARE_TYPES:
+            node = parent.createNode(
+                type_name, node_name=node_name, run_init_scripts=False, load_contents=False
+            )
+        else:
+            node = parent.createNode(type_name, node_name=node_name)
     return node
 
 
-def build_ship(prompt_for_texture: Optional[str]) -> None:
-    import hou  # type: ignore
+@functools.lru_cache(maxsize=None)
+def _uv_op_name() -> str:
+    cat = hou.sopNodeTypeCategory()
+    return "uvflatten::2.0" if cat.nodeType("uvflatten::2.0") else "uvunwrap"
+
 
+@functools.lru_cache(maxsize=None)
+def _shader_name() -> str:
+    cat = hou.matNodeTypeCategory()
+    return "principledshader::2.0" if cat.nodeType("principledshader::2.0") else "principledshader"
+
+
+def build_ship(prompt_for_texture: Optional[str], quality: Quality = "std") -> None:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        # The texture has no dependency on the geometry: request it first and
+        # only wait for it once the material needs the path.
+        texture_file: Optional[Path] = None
+        texture_future = None
+        if prompt_for_texture:
+            texture_file = _TEX_DIR / "ship_texture.png"
+            texture_future = pool.submit(
+                call_sd_txt2img, [prompt_for_texture], [texture_file], quality=quality
+            )
+        with batched_edits():
+            _build_ship(texture_future, texture_file)
+
+
+def _build_ship(
+    texture_future: Optional[concurrent.futures.Future], texture_file: Optional[Path]
+) -> None:
     obj = hou.node("/obj")
     if obj is None:
         obj = hou.node("/").createNode("obj", node_name="obj")
 
-    geo = get_or_create(obj, "geo", "interstellar_ship")
-    # Clear default file SOPs if any
-    for c in geo.children():
-        try:
-            if c.type().name() == "file":
+    geo = obj.node("interstellar_ship")
+    if geo is None:
+        # Skipping init scripts means the default file1 SOP is never created
+        geo = obj.createNode("geo", node_name="interstellar_ship", run_init_scripts=False)
+    else:
+        for c in geo.glob("file*"):
+            try:
                 c.destroy()
-        except Exception:
-            pass
+            except hou.OperationFailed:
+                pass
 
     # Dimensions
     hull_length = 5000.0
     hull_radius = 80.0
 
+    tube_parms = {"type": 1, "orient": 2, "height": hull_length, "cap": True}  # polygon, Z axis
     core = get_or_create(geo, "tube", "hull_core")
-    core.parm("type").set(1)  # polygon
-    core.parm("orient").set(2)  # Z axis
-    core.parm("height").set(hull_length)
-    core.parm("rad1").set(hull_radius)
-    core.parm("rad2").set(hull_radius)
-    core.parm("cap").set(True)
-
-    shield1 = get_or_create(geo, "tube", "hull_shield_1")
-    for p in ("type", "orient", "height", "rad1", "rad2", "cap"):
-        shield1.parm(p).set(core.parm(p))
-    shield1.parm("rad1").set(hull_radius * 1.05)
-    shield1.parm("rad2").set(hull_radius * 1.05)
-
-    shield2 = get_or_create(geo, "tube", "hull_shield_2")
-    for p in ("type", "orient", "height", "rad1", "rad2", "cap"):
-        shield2.parm(p).set(core.parm(p))
-    shield2.parm("rad1").set(hull_radius * 1.1)
-    shield2.parm("rad2").set(hull_radius * 1.1)
-
-    shield3 = get_or_create(geo, "tube", "hull_shield_3")
-    for p in ("type", "orient", "height", "rad1", "rad2", "cap"):
-        shield3.parm(p).set(core.parm(p))
-    shield3.parm("rad1").set(hull_radius * 1.2)
-    shield3.parm("rad2").set(hull_radius * 1.2)
+    core.setParms({**tube_parms, "rad1": hull_radius, "rad2": hull_radius})
+
+    # Layered shielding: one tube stamped at each radius multiplier. The scale
+    # attribute leaves Z at 1 so every layer keeps the full hull length.
+    for legacy in ("hull_shield_1", "hull_shield_2", "hull_shield_3"):
+        if geo.node(legacy) is not None:
+            geo.node(legacy).destroy()
+    shield_tube = get_or_create(geo, "tube", "hull_shield")
+    shield_tube.setParms({**tube_parms, "rad1": hull_radius, "rad2": hull_radius})
+
+    shield_muls = ", ".join(str(m) for m in (1.05, 1.1, 1.2))
+    shield_pts = get_or_create(geo, "attribwrangle", "hull_shield_layers")
+    shield_pts.setParms({
+        "class": 0,  # detail (only once)
+        "snippet": (
+            f"foreach (float m; {{{shield_muls}}}) {{\n"
+            "    int pt = addpoint(0, {0, 0, 0});\n"
+            "    setpointattrib(0, \"scale\", pt, set(m, m, 1.0));\n"
+            "}\n"
+        ),
+    })
+
+    shields = get_or_create(geo, "copytopoints", "hull_shields")
+    shields.setInput(0, shield_tube)
+    shields.setInput(1, shield_pts)
 
     # Engines (rear)
     tail_z = -hull_length * 0.5
@@ -119,57 +485,52 @@ def build_ship(prompt_for_texture: Optional[str]) -> None:
     nozzle_radius = 40.0
 
     noz_l = get_or_create(geo, "cone", "engine_nozzle_L")
-    noz_l.parm("type").set(1)
-    noz_l.parm("height").set(nozzle_length)
-    noz_l.parm("rad").set(nozzle_radius)
-    noz_l.parmTuple("t").set((engine_offset, 0.0, tail_z + nozzle_length * 0.5))
-    noz_l.parmTuple("r").set((90.0, 0.0, 0.0))
+    noz_l.setParms({
+        "type": 1, "height": nozzle_length, "rad": nozzle_radius,
+        "tx": engine_offset, "ty": 0.0, "tz": tail_z + nozzle_length * 0.5,
+        "rx": 90.0, "ry": 0.0, "rz": 0.0,
+    })
 
     noz_r = get_or_create(geo, "cone", "engine_nozzle_R")
-    noz_r.parm("type").set(1)
-    noz_r.parm("height").set(nozzle_length)
-    noz_r.parm("rad").set(nozzle_radius)
-    noz_r.parmTuple("t").set((-engine_offset, 0.0, tail_z + nozzle_length * 0.5))
-    noz_r.parmTuple("r").set((90.0, 0.0, 0.0))
+    noz_r.setParms({
+        "type": 1, "height": nozzle_length, "rad": nozzle_radius,
+        "tx": -engine_offset, "ty": 0.0, "tz": tail_z + nozzle_length * 0.5,
+        "rx": 90.0, "ry": 0.0, "rz": 0.0,
+    })
 
+    plasma_rad = nozzle_radius * 0.6
     plasma_l = get_or_create(geo, "sphere", "engine_plasma_L")
-    plasma_l.parm("type").set(2)
-    for p in ("radx", "rady", "radz"):
-        plasma_l.parm(p).set(nozzle_radius * 0.6)
-    plasma_l.parmTuple("t").set((engine_offset, 0.0, tail_z + nozzle_length))
+    plasma_l.setParms({
+        "type": 2, "radx": plasma_rad, "rady": plasma_rad, "radz": plasma_rad,
+        "tx": engine_offset, "ty": 0.0, "tz": tail_z + nozzle_length,
+    })
 
     plasma_r = get_or_create(geo, "sphere", "engine_plasma_R")
-    plasma_r.parm("type").set(2)
-    for p in ("radx", "rady", "radz"):
-        plasma_r.parm(p).set(nozzle_radius * 0.6)
-    plasma_r.parmTuple("t").set((-engine_offset, 0.0, tail_z + nozzle_length))
+    plasma_r.setParms({
+        "type": 2, "radx": plasma_rad, "rady": plasma_rad, "radz": plasma_rad,
+        "tx": -engine_offset, "ty": 0.0, "tz": tail_z + nozzle_length,
+    })
 
     # Bussard scoop (front)
     nose_z = hull_length * 0.5
     ring = get_or_create(geo, "torus", "bussard_ring")
-    ring.parm("type").set(1)
-    ring.parm("rad1").set(hull_radius * 1.6)
-    ring.parm("rad2").set(hull_radius * 0.2)
-    ring.parmTuple("t").set((0.0, 0.0, nose_z - 50.0))
+    ring.setParms({
+        "type": 1, "rad1": hull_radius * 1.6, "rad2": hull_radius * 0.2,
+        "tx": 0.0, "ty": 0.0, "tz": nose_z - 50.0,
+    })
 
     cone = get_or_create(geo, "cone", "bussard_cone")
-    cone.parm("type").set(1)
-    cone.parm("height").set(400.0)
-    cone.parm("rad").set(hull_radius * 1.2)
-    cone.parmTuple("t").set((0.0, 0.0, nose_z - 200.0))
-    cone.parmTuple("r").set((-90.0, 0.0, 0.0))
+    cone.setParms({
+        "type": 1, "height": 400.0, "rad": hull_radius * 1.2,
+        "tx": 0.0, "ty": 0.0, "tz": nose_z - 200.0,
+        "rx": -90.0, "ry": 0.0, "rz": 0.0,
+    })
 
     # Merge → UVs → Material
     merge = get_or_create(geo, "merge", "ship_merge")
-    for idx, n in enumerate([
-        core, shield1, shield2, shield3, noz_l, noz_r, plasma_l, plasma_r, ring, cone
-    ]):
-        merge.setInput(idx, n)
+    set_inputs(merge, [core, shields, noz_l, noz_r, plasma_l, plasma_r, ring, cone])
 
-    uv_op = (
-        "uvflatten::2.0" if hou.sopNodeTypeCategory().nodeType("uvflatten::2.0") else "uvunwrap"
-    )
-    uvs = get_or_create(geo, uv_op, "uvs")
+    uvs = get_or_create(geo, _uv_op_name(), "uvs")
     uvs.setInput(0, merge)
 
     # Material SOP
@@ -180,27 +541,19 @@ def build_ship(prompt_for_texture: Optional[str]) -> None:
     matnet = hou.node("/mat")
     if matnet is None:
         matnet = hou.node("/").createNode("matnet", node_name="mat")
-    shader_type = (
-        "principledshader::2.0"
-        if hou.matNodeTypeCategory().nodeType("principledshader::2.0")
-        else "principledshader"
-    )
-    mat = get_or_create(matnet, shader_type, "ship_mat")
+    mat = get_or_create(matnet, _shader_name(), "ship_mat")
 
     # Optional AI texture
-    texture_file: Optional[Path] = None
-    if prompt_for_texture:
-        project_root = Path.cwd()
-        texture_file = project_root / "ai_tools" / "generated" / "ship_texture.png"
-        ok = call_sd_txt2img(prompt_for_texture, texture_file)
-        if ok:
-            # Toggle texture parms when present
-            for name in ("basecolor_useTexture", "basecolortex_useTexture"):
-                if mat.parm(name):
-                    mat.parm(name).set(1)
-            for name in ("basecolor_texture", "basecolortex_texture"):
-                if mat.parm(name):
-                    mat.parm(name).set(str(texture_file))
+    if texture_future is not None and texture_future.result():
+        # Toggle and fill texture parms when present
+        tex_str = os.fspath(texture_file)
+        for name in (
+            "basecolor_useTexture", "basecolortex_useTexture",
+            "basecolor_texture", "basecolortex_texture",
+        ):
+            parm = mat.parm(name)
+            if parm is not None:
+                parm.set(1 if name.endswith("useTexture") else tex_str)
 
     # Assign material to all prims
     if mat_sop.parm("num_materials"):
@@ -210,19 +563,27 @@ def build_ship(prompt_for_texture: Optional[str]) -> None:
     if mat_sop.parm("shop_materialpath1"):
         mat_sop.parm("shop_materialpath1").set(mat.path())
 
-    # Display flags
+    # Display flags, then a single cook of the finished network
     geo.setDisplayFlag(True)
     mat_sop.setDisplayFlag(True)
     mat_sop.setRenderFlag(True)
+    mat_sop.cook(force=True)
 
     geo.layoutChildren()
 
 
-def main() -> None:
-    try:
-        import hou  # type: ignore
-    except Exception as exc:
-        raise SystemExit("This script must be run with hython (Houdini Python).") from exc
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate the Interstellar ship blockout.")
+    parser.add_argument(
+        "--quality",
+        choices=sorted(_QUALITY_PRESETS),
+        default="std",
+        help="SD texture preset: fast=15 steps @512², std=20 @768², high=25 @1024²",
+    )
+    args = parser.parse_args(argv)
+
+    if hou is None:
+        raise SystemExit("This script must be run with hython (Houdini Python).")
 
     # New empty scene
     try:
@@ -235,14 +596,11 @@ def main() -> None:
         "layered metallic shielding, interstellar spacecraft hull panels, "
         "futuristic metallic plating, subtle grime and seams, high detail"
     )
-    build_ship(prompt_for_texture=texture_prompt)
-
-    # Ensure output directory exists and save .hipnc
-    project_root = Path.cwd()
-    out_dir = project_root / "houdini"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / "generated_interstellar_ship.hipnc"
-    hou.hipFile.save(str(out_file))
+    build_ship(prompt_for_texture=texture_prompt, quality=args.quality)
+
+    _HIP_DIR.mkdir(parents=True, exist_ok=True)
+    out_file = _HIP_DIR / "generated_interstellar_ship.hipnc"
+    out_file = save_hip_atomic(out_file)
     print(f"[Interstellar] Scene saved: {out_file}")
 
 
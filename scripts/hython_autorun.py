@@ -8,12 +8,16 @@ Run inside hython. Automates:
 
 from __future__ import annotations
 
+import importlib.util
 import os
 from pathlib import Path
 
 
 def main() -> None:
+    if importlib.util.find_spec("hou") is None:
+        raise SystemExit("This script must be run with hython (Houdini Python).")
     import hou  # type: ignore
+    from scripts.setup_houdini_ai import batched_edits, save_hip_atomic, setup_interstellar_ai
 
     project_root = Path(os.getcwd())
 
@@ -26,38 +30,38 @@ def main() -> None:
     except Exception as exc:
         print(f"[Interstellar] HDA install skipped: {exc}")
 
-    # Create TOP network scaffold
-    obj = hou.node("/obj")
-    if obj is None:
-        raise RuntimeError("/obj not found")
-    topnet = obj.node("stablehoudini_pdg") or obj.createNode("topnet", node_name="stablehoudini_pdg")
-    try:
-        if topnet.node("localscheduler") is None:
-            topnet.createNode("localscheduler", node_name="localscheduler")
-    except Exception as exc:
-        print(f"[Interstellar] localscheduler setup skipped: {exc}")
-
-    # Create SD Dream (PDG) node if available and set basic parms
-    sd_node = topnet.node("sd_dream1")
-    if sd_node is None:
-        try:
-            # HDA internal type name is the basename of the .hda (TOP operator)
-            sd_node = topnet.createNode("top_Stable_Diffusion", node_name="sd_dream1")
-        except Exception as exc:
-            print(f"[Interstellar] Could not create SD Dream node: {exc}")
-            sd_node = None
-    if sd_node is not None:
+    # Scaffold edits are scripted; skip undo snapshots and per-edit cooks
+    with batched_edits():
+        # Create TOP network scaffold
+        obj = hou.node("/obj")
+        if obj is None:
+            raise RuntimeError("/obj not found")
+        topnet = obj.node("stablehoudini_pdg") or obj.createNode("topnet", node_name="stablehoudini_pdg")
         try:
-            if sd_node.parm("api_url"):
-                sd_node.parm("api_url").set("http://127.0.0.1:7860")
-            if sd_node.parm("prompt"):
-                sd_node.parm("prompt").set("retro-futuristic cockpit with neon holograms")
+            if topnet.node("localscheduler") is None:
+                topnet.createNode("localscheduler", node_name="localscheduler")
         except Exception as exc:
-            print(f"[Interstellar] Could not set SD Dream parms: {exc}")
+            print(f"[Interstellar] localscheduler setup skipped: {exc}")
 
-    # Build geometry using project script
-    from scripts.setup_houdini_ai import setup_interstellar_ai
+        # Create SD Dream (PDG) node if available and set basic parms
+        sd_node = topnet.node("sd_dream1")
+        if sd_node is None:
+            try:
+                # HDA internal type name is the basename of the .hda (TOP operator)
+                sd_node = topnet.createNode("top_Stable_Diffusion", node_name="sd_dream1")
+            except Exception as exc:
+                print(f"[Interstellar] Could not create SD Dream node: {exc}")
+                sd_node = None
+        if sd_node is not None:
+            try:
+                if sd_node.parm("api_url"):
+                    sd_node.parm("api_url").set("http://127.0.0.1:7860")
+                if sd_node.parm("prompt"):
+                    sd_node.parm("prompt").set("retro-futuristic cockpit with neon holograms")
+            except Exception as exc:
+                print(f"[Interstellar] Could not set SD Dream parms: {exc}")
 
+    # Build geometry using project script (batches its own edits)
     setup_interstellar_ai(
         sd_api_url="http://127.0.0.1:7860",
         prompt="futuristic metallic spaceship panel with neon accents",
@@ -68,7 +72,7 @@ def main() -> None:
 
     hip_path = project_root / "houdini" / "interstellar_ship.hip"
     hip_path.parent.mkdir(parents=True, exist_ok=True)
-    hou.hipFile.save(str(hip_path))
+    hip_path = save_hip_atomic(hip_path)
     print(f"[Interstellar] Saved .hip to {hip_path}")
 
 
@@ -19,12 +19,16 @@ Notes:
 
 from __future__ import annotations
 
+import concurrent.futures
+import contextlib
+import functools
 import os
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Sequence, Tuple
 
 
+@functools.lru_cache(maxsize=None)
 def _ensure_houdini() -> None:
     try:
         import hou  # type: ignore
@@ -34,6 +38,7 @@ def _ensure_houdini() -> None:
         ) from exc
 
 
+@functools.lru_cache(maxsize=None)
 def _check_versions() -> None:
     import hou  # type: ignore
 
@@ -51,6 +56,89 @@ def _check_versions() -> None:
         pass
 
 
+@functools.lru_cache(maxsize=None)
+def _sop_type(name: str):
+    import hou  # type: ignore
+
+    return hou.sopNodeTypeCategory().nodeType(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _mat_type(name: str):
+    import hou  # type: ignore
+
+    return hou.matNodeTypeCategory().nodeType(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _rop_type(name: str):
+    import hou  # type: ignore
+
+    return hou.ropNodeTypeCategory().nodeType(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _top_type(name: str):
+    import hou  # type: ignore
+
+    return hou.topNodeTypeCategory().nodeType(name)
+
+
+def _first_available(
+    type_fn: Callable[[str], object], names: Sequence[str], default: Optional[str] = None
+) -> Optional[str]:
+    """Return the first of names that type_fn resolves, else default."""
+    for name in names:
+        if type_fn(name) is not None:
+            return name
+    return default
+
+
+@contextlib.contextmanager
+def batched_edits():
+    """Suspend undo recording and viewport cooking; restores the update mode after."""
+    import hou  # type: ignore
+
+    prev_mode = hou.updateModeSetting()
+    hou.setUpdateMode(hou.updateMode.Manual)
+    try:
+        with hou.undos.disabler():
+            yield
+    finally:
+        hou.setUpdateMode(prev_mode)
+
+
+def save_hip_atomic(out_file: Path) -> Path:
+    """Save to a sibling temp file, then rename it over out_file.
+
+    A crash mid-save never leaves a truncated scene behind. Apprentice/Indie
+    licenses force their own extension (.hipnc/.hiplc), so the rename follows the
+    file Houdini actually wrote; returns the final path.
+    """
+    import hou  # type: ignore
+
+    tmp = out_file.with_name(f"{out_file.stem}.tmp{out_file.suffix}")
+    hou.hipFile.save(str(tmp), save_to_recent_files=False)
+    written = Path(hou.hipFile.path())
+    final = out_file.with_suffix(written.suffix)
+    os.replace(written, final)
+    hou.hipFile.setName(str(final))
+    return final
+
+
+# (node, "display" | "render") toggles returned by the builders under "flags"
+Flag = Tuple[object, str]
+
+
+def _apply_flags(flags: Sequence[Flag]) -> None:
+    """Set the builders' flags in one pass once the network is fully wired."""
+    for node, flag in flags:
+        if flag == "display":
+            node.setDisplayFlag(True)
+        else:
+            node.setRenderFlag(True)
+
+
 def _get_or_create(parent, type_name: str, node_name: str):
     node = parent.node(node_name)
     if node is None:
@@ -58,10 +146,47 @@ def _get_or_create(parent, type_name: str, node_name: str):
     return node
 
 
-def _create_spaceship_blockout(prompt_tweaks: Optional[str] = None):
-    import hou  # type: ignore
+def set_inputs(node, inputs: Sequence) -> None:
+    """Wire inputs in order, in one call when this Houdini build has Node.setInputs."""
+    bulk = getattr(node, "setInputs", None)
+    if bulk is not None:
+        bulk(list(inputs))
+        return
+    for idx, n in enumerate(inputs):
+        node.setInput(idx, n)
 
-    obj = hou.node("/obj")
+
+def _make_tube(geo, name: str, length: float, radius: float):
+    """Capped polygon tube along the Z axis."""
+    node = _get_or_create(geo, "tube", name)
+    node.setParms({"type": 1, "orient": 2, "height": length, "rad1": radius, "rad2": radius, "cap": True})
+    return node
+
+
+def _make_nozzle(geo, name: str, x: float, z: float, length: float, radius: float):
+    """Polygon engine cone centred at (x, 0, z), aimed along +Z."""
+    node = _get_or_create(geo, "cone", name)
+    node.setParms({
+        "type": 1, "height": length, "rad": radius,
+        "tx": x, "ty": 0.0, "tz": z,
+        "rx": 90.0, "ry": 0.0, "rz": 0.0,
+    })
+    return node
+
+
+def _make_plasma(geo, name: str, x: float, z: float, radius: float):
+    """Polygon plasma-core sphere centred at (x, 0, z)."""
+    node = _get_or_create(geo, "sphere", name)
+    node.setParms({
+        "type": 2, "radx": radius, "rady": radius, "radz": radius,
+        "tx": x, "ty": 0.0, "tz": z,
+    })
+    return node
+
+
+def _create_spaceship_blockout(
+    obj, prompt_tweaks: Optional[str] = None, reduce_percent: float = 100.0, sd_enabled: bool = False
+):
     if obj is None:
         raise RuntimeError("/obj not found")
 
@@ -78,26 +203,11 @@ def _create_spaceship_blockout(prompt_tweaks: Optional[str] = None):
     hull_length = 5000.0
     hull_radius = 80.0
 
-    core = _get_or_create(geo, "tube", "hull_core")
-    core.parm("type").set(1)  # Polygon
-    core.parm("orient").set(2)  # Z axis
-    core.parm("height").set(hull_length)
-    core.parm("rad1").set(hull_radius)
-    core.parm("rad2").set(hull_radius)
-    core.parm("cap").set(True)
+    core = _make_tube(geo, "hull_core", hull_length, hull_radius)
 
     # Layered metallic shielding (slightly larger radii shells)
-    shield1 = _get_or_create(geo, "tube", "hull_shield_1")
-    for p in ("type", "orient", "height", "rad1", "rad2", "cap"):
-        shield1.parm(p).set(core.parm(p))
-    shield1.parm("rad1").set(hull_radius * 1.05)
-    shield1.parm("rad2").set(hull_radius * 1.05)
-
-    shield2 = _get_or_create(geo, "tube", "hull_shield_2")
-    for p in ("type", "orient", "height", "rad1", "rad2", "cap"):
-        shield2.parm(p).set(core.parm(p))
-    shield2.parm("rad1").set(hull_radius * 1.1)
-    shield2.parm("rad2").set(hull_radius * 1.1)
+    shield1 = _make_tube(geo, "hull_shield_1", hull_length, hull_radius * 1.05)
+    shield2 = _make_tube(geo, "hull_shield_2", hull_length, hull_radius * 1.1)
 
     # Fusion engines (rear): nozzle cones + plasma cores near tail (negative Z)
     tail_z = -hull_length * 0.5
@@ -105,82 +215,54 @@ def _create_spaceship_blockout(prompt_tweaks: Optional[str] = None):
     nozzle_length = 150.0
     nozzle_radius = 40.0
 
-    noz_l = _get_or_create(geo, "cone", "engine_nozzle_L")
-    noz_l.parm("type").set(1)  # polygon
-    noz_l.parm("height").set(nozzle_length)
-    noz_l.parm("rad").set(nozzle_radius)
-    noz_l.parmTuple("t").set((engine_offset, 0.0, tail_z + nozzle_length * 0.5))
-    noz_l.parmTuple("r").set((90.0, 0.0, 0.0))  # aim along +Z
-
-    noz_r = _get_or_create(geo, "cone", "engine_nozzle_R")
-    noz_r.parm("type").set(1)
-    noz_r.parm("height").set(nozzle_length)
-    noz_r.parm("rad").set(nozzle_radius)
-    noz_r.parmTuple("t").set((-engine_offset, 0.0, tail_z + nozzle_length * 0.5))
-    noz_r.parmTuple("r").set((90.0, 0.0, 0.0))
-
-    plasma_l = _get_or_create(geo, "sphere", "engine_plasma_L")
-    plasma_l.parm("type").set(2)
-    plasma_l.parm("radx").set(nozzle_radius * 0.6)
-    plasma_l.parm("rady").set(nozzle_radius * 0.6)
-    plasma_l.parm("radz").set(nozzle_radius * 0.6)
-    plasma_l.parmTuple("t").set((engine_offset, 0.0, tail_z + nozzle_length))
-
-    plasma_r = _get_or_create(geo, "sphere", "engine_plasma_R")
-    plasma_r.parm("type").set(2)
-    plasma_r.parm("radx").set(nozzle_radius * 0.6)
-    plasma_r.parm("rady").set(nozzle_radius * 0.6)
-    plasma_r.parm("radz").set(nozzle_radius * 0.6)
-    plasma_r.parmTuple("t").set((-engine_offset, 0.0, tail_z + nozzle_length))
+    noz_z = tail_z + nozzle_length * 0.5
+    noz_l = _make_nozzle(geo, "engine_nozzle_L", engine_offset, noz_z, nozzle_length, nozzle_radius)
+    noz_r = _make_nozzle(geo, "engine_nozzle_R", -engine_offset, noz_z, nozzle_length, nozzle_radius)
+
+    plasma_z = tail_z + nozzle_length
+    plasma_l = _make_plasma(geo, "engine_plasma_L", engine_offset, plasma_z, nozzle_radius * 0.6)
+    plasma_r = _make_plasma(geo, "engine_plasma_R", -engine_offset, plasma_z, nozzle_radius * 0.6)
 
     # Bussard scoops (front): intake ring + cone (positive Z)
     nose_z = hull_length * 0.5
     scoop_ring = _get_or_create(geo, "torus", "bussard_ring")
-    scoop_ring.parm("type").set(1)
-    scoop_ring.parm("rad1").set(hull_radius * 1.6)
-    scoop_ring.parm("rad2").set(hull_radius * 0.2)
-    scoop_ring.parmTuple("t").set((0.0, 0.0, nose_z - 50.0))
+    scoop_ring.setParms({
+        "type": 1, "rad1": hull_radius * 1.6, "rad2": hull_radius * 0.2,
+        "tx": 0.0, "ty": 0.0, "tz": nose_z - 50.0,
+    })
 
     scoop_cone = _get_or_create(geo, "cone", "bussard_cone")
-    scoop_cone.parm("type").set(1)
-    scoop_cone.parm("height").set(400.0)
-    scoop_cone.parm("rad").set(hull_radius * 1.2)
-    scoop_cone.parmTuple("t").set((0.0, 0.0, nose_z - 200.0))
-    scoop_cone.parmTuple("r").set((-90.0, 0.0, 0.0))  # open toward +Z
+    scoop_cone.setParms({
+        "type": 1, "height": 400.0, "rad": hull_radius * 1.2,
+        "tx": 0.0, "ty": 0.0, "tz": nose_z - 200.0,
+        "rx": -90.0, "ry": 0.0, "rz": 0.0,  # open toward +Z
+    })
 
     merge = _get_or_create(geo, "merge", "ship_merge")
-    merge.setInput(0, core)
-    merge.setInput(1, shield1)
-    merge.setInput(2, shield2)
-    merge.setInput(3, noz_l)
-    merge.setInput(4, noz_r)
-    merge.setInput(5, plasma_l)
-    merge.setInput(6, plasma_r)
-    merge.setInput(7, scoop_ring)
-    merge.setInput(8, scoop_cone)
-
-    polyreduce = _get_or_create(geo, "polyreduce::2.0", "opt_reduce") if hou.sopNodeTypeCategory().nodeType("polyreduce::2.0") else _get_or_create(geo, "polyreduce", "opt_reduce")
-    polyreduce.setInput(0, merge)
-    polyreduce.parm("percentage").set(100)  # default no reduction; keep node for later
+    set_inputs(merge, (core, shield1, shield2, noz_l, noz_r, plasma_l, plasma_r, scoop_ring, scoop_cone))
+
+    # Polyreduce still rebuilds the mesh at 100%, so only insert it when it reduces
+    reduced = merge
+    if reduce_percent < 100:
+        reduced = _get_or_create(geo, _first_available(_sop_type, ("polyreduce::2.0",), "polyreduce"), "opt_reduce")
+        reduced.setInput(0, merge)
+        reduced.parm("percentage").set(reduce_percent)
+    elif geo.node("opt_reduce") is not None:
+        geo.node("opt_reduce").destroy()
 
     # UVs
-    uvflatten = _get_or_create(geo, "uvflatten::2.0", "uvs") if hou.sopNodeTypeCategory().nodeType("uvflatten::2.0") else _get_or_create(geo, "uvunwrap", "uvs")
-    uvflatten.setInput(0, polyreduce)
+    uvflatten = _get_or_create(geo, _first_available(_sop_type, ("uvflatten::2.0",), "uvunwrap"), "uvs")
+    uvflatten.setInput(0, reduced)
 
     # Optional: prompt-driven tweaks
     output = uvflatten
     if prompt_tweaks:
-        output = _apply_prompt_tweaks(geo, output, prompt_tweaks)
+        output = _apply_prompt_tweaks(geo, output, prompt_tweaks, sd_enabled=sd_enabled)
 
     # Material assignment placeholder
     mat_sop = _get_or_create(geo, "material", "assign_material")
     mat_sop.setInput(0, output)
 
-    # Flag the display node
-    geo.setDisplayFlag(True)
-    mat_sop.setDisplayFlag(True)
-    mat_sop.setRenderFlag(True)
-
     return {
         "obj": obj,
         "geo": geo,
@@ -190,6 +272,8 @@ def _create_spaceship_blockout(prompt_tweaks: Optional[str] = None):
         "engines": (noz_l, noz_r),
         "plasma": (plasma_l, plasma_r),
         "bussard": (scoop_ring, scoop_cone),
+        # Display node, applied by the caller after wiring
+        "flags": [(geo, "display"), (mat_sop, "display"), (mat_sop, "render")],
     }
 
 
@@ -198,8 +282,6 @@ def _add_cockpit(parent_obj, style_prompt: Optional[str] = None):
 
     style_prompt examples: "retro-futuristic cockpit with neon holograms"
     """
-    import hou  # type: ignore
-
     geo = _get_or_create(parent_obj, "geo", "interstellar_cockpit")
     for c in geo.children():
         try:
@@ -210,62 +292,83 @@ def _add_cockpit(parent_obj, style_prompt: Optional[str] = None):
 
     # Dashboard as a thin grid panel inside hull
     grid = _get_or_create(geo, "grid", "dashboard_grid")
-    grid.parm("sizex").set(4.0)
-    grid.parm("sizey").set(2.0)
-    grid.parmTuple("t").set((0.0, 1.2, 0.0))
-    grid.parmTuple("r").set((-10.0, 0.0, 0.0))
+    grid.setParms({
+        "sizex": 4.0, "sizey": 2.0,
+        "tx": 0.0, "ty": 1.2, "tz": 0.0,
+        "rx": -10.0, "ry": 0.0, "rz": 0.0,
+    })
 
     # Hologram emitters: scattered small spheres above dashboard
     scatter = _get_or_create(geo, "scatter", "holo_scatter")
     scatter.setInput(0, grid)
-    scatter.parm("npts").set(20)
-    scatter.parm("relax").set(1)
+    scatter.setParms({"npts": 20, "relax": 1})
 
     sphere = _get_or_create(geo, "sphere", "holo_orb")
-    sphere.parm("type").set(2)
-    sphere.parm("radx").set(0.07)
-    sphere.parm("rady").set(0.07)
-    sphere.parm("radz").set(0.07)
+    sphere.setParms({"type": 2, "radx": 0.07, "rady": 0.07, "radz": 0.07})
 
     ctp = _get_or_create(geo, "copytopoints", "holo_copy")
     ctp.setInput(0, sphere)
     ctp.setInput(1, scatter)
+    # Left unpacked: cockpit_uvs and the emit attribute need the orbs' real polygons
 
     merge = _get_or_create(geo, "merge", "cockpit_merge")
-    merge.setInput(0, grid)
-    merge.setInput(1, ctp)
+    set_inputs(merge, (grid, ctp))
 
     # UVs for cockpit
-    uvflatten = _get_or_create(geo, "uvflatten::2.0", "cockpit_uvs") if hou.sopNodeTypeCategory().nodeType("uvflatten::2.0") else _get_or_create(geo, "uvunwrap", "cockpit_uvs")
+    uvflatten = _get_or_create(geo, _first_available(_sop_type, ("uvflatten::2.0",), "uvunwrap"), "cockpit_uvs")
     uvflatten.setInput(0, merge)
 
     # Interior camera
     cam = _get_or_create(parent_obj, "cam", "cockpit_cam")
-    cam.parmTuple("t").set((0.0, 1.5, 2.5))
-    cam.parmTuple("r").set((-8.0, 0.0, 0.0))
+    cam.setParms({"tx": 0.0, "ty": 1.5, "tz": 2.5, "rx": -8.0, "ry": 0.0, "rz": 0.0})
 
     # Simple emissive look hint: attribute for holograms
     attrib = _get_or_create(geo, "attribcreate", "holo_emission_hint")
     attrib.setInput(0, uvflatten)
-    attrib.parm("name").set("emit")
-    attrib.parm("class").set(1)  # point
-    attrib.parm("type").set(0)  # float
-    attrib.parm("value1").set(5.0)
+    attrib.setParms({"name": "emit", "class": 1, "type": 0, "value1": 5.0})  # point, float
+
+    return {
+        "geo": geo,
+        "camera": cam,
+        "out": attrib,
+        "flags": [(attrib, "display"), (attrib, "render")],
+    }
+
 
-    attrib.setDisplayFlag(True)
-    attrib.setRenderFlag(True)
+# Appended to the SD prompt when rivets are painted by the texture instead of modelled
+_RIVET_PROMPT = "riveted panels"
 
-    return {"geo": geo, "camera": cam, "out": attrib}
 
+def _apply_prompt_tweaks(geo_node, input_node, prompt_text: str, sd_enabled: bool = False):
+    """Add simple procedural details based on keywords in prompt_text.
 
-def _apply_prompt_tweaks(geo_node, input_node, prompt_text: str):
-    """Add simple procedural details based on keywords in prompt_text."""
+    With SD enabled, rivets are left to the generated texture and only tagged
+    with a detail attribute; geometry rivets are the no-SD fallback.
+    """
     import hou  # type: ignore
 
     text = prompt_text.lower()
     out = input_node
-
-    if "rivet" in text:
+    # Independent detail branches, merged as siblings so they can cook in parallel
+    branches = []
+    # Drop the old chained merges and whichever rivet variant an earlier run with
+    # the other SD setting left behind
+    stale = ["merge_rivets", "merge_conduit"]
+    if sd_enabled:
+        stale += ["rivets_scatter", "rivet_circle", "rivets_copy"]
+    else:
+        stale.append("rivets_hint")
+    for name in stale:
+        node = geo_node.node(name)
+        if node is not None:
+            node.destroy()
+
+    if "rivet" in text and sd_enabled:
+        hint = _get_or_create(geo_node, "attribcreate", "rivets_hint")
+        hint.setInput(0, out)
+        hint.setParms({"name": "sd_prompt_hint", "class": 0, "type": 3, "string": _RIVET_PROMPT})  # detail, string
+        out = hint
+    elif "rivet" in text:
         # Scatter points on hull, copy small circles as rivets
         scatter = _get_or_create(geo_node, "scatter", "rivets_scatter")
         scatter.setInput(0, out)
@@ -279,8 +382,8 @@ def _apply_prompt_tweaks(geo_node, input_node, prompt_text: str):
         ctp = _get_or_create(geo_node, "copytopoints", "rivets_copy")
         ctp.setInput(0, circle)
         ctp.setInput(1, scatter)
-
-        out = _connect_merge(geo_node, out, ctp, name="merge_rivets")
+        _pack_copies(ctp)
+        branches.append(ctp)
 
     if "glow" in text or "conduit" in text:
         # Simple glowing conduit: a curve extruded with polywire
@@ -292,38 +395,27 @@ def _apply_prompt_tweaks(geo_node, input_node, prompt_text: str):
         polywire = _get_or_create(geo_node, "polywire", "conduit_wire")
         polywire.setInput(0, curve)
         polywire.parm("radius").set(0.05)
+        branches.append(polywire)
 
-        out = _connect_merge(geo_node, out, polywire, name="merge_conduit")
+    if branches:
+        merge = _get_or_create(geo_node, "merge", "merge_details")
+        inputs = [out] + branches
+        # Unhook inputs left over from a run with more branches
+        for idx in range(len(merge.inputs()) - 1, len(inputs) - 1, -1):
+            merge.setInput(idx, None)
+        set_inputs(merge, inputs)
+        out = merge
 
     return out
 
 
-def _connect_merge(parent, a, b, name: str = "merge"):
-    node = parent.node(name)
-    if node is None or node.type().name() != "merge":
-        node = parent.createNode("merge", node_name=name)
-    # find next free input
-    inputs = [i for i in range(10)]
-    # connect existing first input if not connected
-    if node.input(0) is None:
-        node.setInput(0, a)
-        node.setInput(1, b)
-    else:
-        # find available slot
-        idx = 1
-        while node.input(idx) is not None:
-            idx += 1
-        node.setInput(idx, b)
-        # ensure first input remains the base chain
-        if node.input(0) != a:
-            node.setInput(0, a)
-    return node
-
+def _pack_copies(ctp) -> None:
+    """Enable "Pack and Instance" so copies are packed prims sharing one source mesh."""
+    if ctp.parm("pack") is not None:
+        ctp.parm("pack").set(1)
 
-def _create_camera_and_lights():
-    import hou  # type: ignore
 
-    obj = hou.node("/obj")
+def _create_camera_and_lights(obj):
     cam = _get_or_create(obj, "cam", "interstellar_cam")
     cam.parmTuple("t").set((0, 5, 50))
     cam.parmTuple("r").set((-10, 0, 0))
@@ -337,17 +429,16 @@ def _create_camera_and_lights():
     return cam
 
 
-def _try_stablehoudini_pdg(cockpit_geo_path: str) -> None:
+def _try_stablehoudini_pdg(obj, cockpit_geo_path: str) -> None:
     """If StableHoudini TOP node types are available, build a minimal img2img PDG graph.
 
     This function is best-effort and safe to call even if StableHoudini is not installed.
     """
     try:
-        import hou  # type: ignore
         # Check for TOPs context
-        topnet = hou.node("/obj").node("stablehoudini_pdg")
+        topnet = obj.node("stablehoudini_pdg")
         if topnet is None:
-            topnet = hou.node("/obj").createNode("topnet", node_name="stablehoudini_pdg")
+            topnet = obj.createNode("topnet", node_name="stablehoudini_pdg")
 
         # Try a StableHoudini TOP (node name may vary; using a generic name)
         # Common HDA op names could be like: "sd_img2img" or "top_stable_diffusion" under TOPs
@@ -356,14 +447,11 @@ def _try_stablehoudini_pdg(cockpit_geo_path: str) -> None:
             "sd_img2img",  # hypothetical
             "top_stable_diffusion",  # HDA name from StableHoudini
         ]
-        sd_top = None
-        for t in node_types:
-            if hou.topNodeTypeCategory().nodeType(t):
-                sd_top = topnet.createNode(t, node_name="sd_img2img_cockpit")
-                break
-        if sd_top is None:
+        sd_type = _first_available(_top_type, node_types)
+        if sd_type is None:
             print("[Interstellar] StableHoudini TOP node not found; skipping PDG setup.")
             return
+        sd_top = topnet.createNode(sd_type, node_name="sd_img2img_cockpit")
 
         # Minimal wiring and parms (actual parms depend on HDA; set only when they exist)
         if sd_top.parm("api_url"):
@@ -384,16 +472,19 @@ def _try_stablehoudini_pdg(cockpit_geo_path: str) -> None:
         print(f"[Interstellar] StableHoudini PDG setup skipped: {exc}")
 
 
-def _render_viewport_snapshot(output_path: Path, camera_path: str, objects_path: str) -> bool:
-    """Render with OpenGL ROP if available, otherwise skip gracefully."""
-    import hou  # type: ignore
+# Resolution of SD textures; snapshots are rendered at the same size so img2img needs no resize
+_SD_RES = (1024, 1024)
 
-    out = hou.node("/out")
+
+def _render_viewport_snapshot(
+    out, output_path: Path, camera_path: str, objects_path: str, res: Tuple[int, int] = _SD_RES
+) -> bool:
+    """Render with OpenGL ROP if available, otherwise skip gracefully."""
     if out is None:
         return False
 
     # Prefer OpenGL ROP for speed; may be named "ogl" or "opengl" depending on version
-    rop_type = "opengl" if hou.ropNodeTypeCategory().nodeType("opengl") else ("ogl" if hou.ropNodeTypeCategory().nodeType("ogl") else None)
+    rop_type = _first_available(_rop_type, ("opengl", "ogl"))
     if rop_type is None:
         print("[Interstellar] No OpenGL ROP available; skipping snapshot render.")
         return False
@@ -402,8 +493,8 @@ def _render_viewport_snapshot(output_path: Path, camera_path: str, objects_path:
     rop.parm("camera").set(camera_path)
     rop.parm("vm_picture").set(str(output_path))
     rop.parm("trange").set(0)
-    rop.parm("res1").set(1024)
-    rop.parm("res2").set(1024)
+    rop.parm("res1").set(res[0])
+    rop.parm("res2").set(res[1])
     try:
         rop.render()
         return output_path.exists()
@@ -412,18 +503,73 @@ def _render_viewport_snapshot(output_path: Path, camera_path: str, objects_path:
         return False
 
 
-def _call_stable_diffusion(init_image: Optional[Path], prompt: str, output_image: Path, api_url: Optional[str]) -> bool:
+# Chunk sizes for base64 streaming: raw reads are a multiple of 3 bytes and encoded
+# slices a multiple of 4 characters, so every chunk converts on its own.
+_B64_RAW_CHUNK = 48 * 1024
+_B64_TEXT_CHUNK = 64 * 1024
+
+
+def _encode_b64_file(path: Path) -> str:
+    """Base64-encode a file chunk by chunk instead of reading it whole first."""
+    import base64
+    import io
+
+    buf = io.BytesIO()
+    with path.open("rb") as src:
+        for chunk in iter(lambda: src.read(_B64_RAW_CHUNK), b""):
+            buf.write(base64.b64encode(chunk))
+    return buf.getvalue().decode("ascii")
+
+
+def _decode_b64_to_file(img_b64: str, path: Path) -> None:
+    """Decode base64 straight into path without building the full PNG in memory."""
+    import binascii
+
+    with path.open("wb") as f:
+        for start in range(0, len(img_b64), _B64_TEXT_CHUNK):
+            f.write(binascii.a2b_base64(img_b64[start:start + _B64_TEXT_CHUNK]))
+
+
+_SD_SESSION = None
+# (connect, read): fail fast when the server is down, allow slow generations
+_SD_TIMEOUT = (5, 120)
+
+
+def _sd_session():
+    """Shared keep-alive session so ship and cockpit calls reuse one connection.
+
+    Create it on the main thread before submitting SD calls, so pool workers never
+    race to build their own. Returns None when requests is not installed.
+    """
+    global _SD_SESSION
+    if _SD_SESSION is None:
+        try:
+            import requests  # type: ignore
+        except Exception:
+            return None
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _SD_SESSION = session
+    return _SD_SESSION
+
+
+def _call_stable_diffusion(
+    init_image: Optional[Path], prompt: str, output_image: Path, api_url: Optional[str], session=None
+) -> bool:
     """Send an image/prompt to a Stable Diffusion HTTP API (Automatic1111-compatible).
 
+    Uses session when given, otherwise the module-level keep-alive session.
     If api_url is None or request fails, returns False.
     """
     if not api_url:
         print("[Interstellar] No Stable Diffusion API URL provided; skipping.")
         return False
 
-    try:
-        import requests  # type: ignore
-    except Exception:
+    if session is None:
+        session = _sd_session()
+    if session is None:
         print("[Interstellar] 'requests' not available in this Houdini Python; skipping SD call.")
         return False
 
@@ -432,26 +578,21 @@ def _call_stable_diffusion(init_image: Optional[Path], prompt: str, output_image
         "steps": 20,
         "cfg_scale": 7.0,
         "sampler_name": "Euler a",
-        "width": 1024,
-        "height": 1024,
+        "width": _SD_RES[0],
+        "height": _SD_RES[1],
     }
 
-    files = None
     endpoint = "/sdapi/v1/txt2img"
     if init_image and init_image.exists():
         # Use img2img when we have an init image
         endpoint = "/sdapi/v1/img2img"
-        import base64
-
-        with init_image.open("rb") as f:
-            init_b64 = base64.b64encode(f.read()).decode("utf-8")
         payload.update({
-            "init_images": [init_b64],
+            "init_images": [_encode_b64_file(init_image)],
             "denoising_strength": 0.6,
         })
 
     try:
-        resp = requests.post(api_url.rstrip("/") + endpoint, json=payload, timeout=120)
+        resp = session.post(api_url.rstrip("/") + endpoint, json=payload, timeout=_SD_TIMEOUT)
         resp.raise_for_status()
         data = resp.json()
         images = data.get("images") or []
@@ -459,26 +600,17 @@ def _call_stable_diffusion(init_image: Optional[Path], prompt: str, output_image
             print("[Interstellar] SD returned no images.")
             return False
 
-        import base64
-        img_b64 = images[0]
-        png_bytes = base64.b64decode(img_b64)
         output_image.parent.mkdir(parents=True, exist_ok=True)
-        output_image.write_bytes(png_bytes)
+        _decode_b64_to_file(images[0], output_image)
         return True
     except Exception as exc:
         print(f"[Interstellar] Stable Diffusion request failed: {exc}")
         return False
 
 
-def _create_or_update_material(texture_path: Optional[Path]):
-    import hou  # type: ignore
-
-    matnet = hou.node("/mat")
-    if matnet is None:
-        matnet = hou.node("/").createNode("matnet", node_name="mat")
-
+def _create_or_update_material(matnet, texture_path: Optional[Path]):
     # Try a modern Principled Shader name first, fallback to legacy
-    shader_type = "principledshader::2.0" if hou.matNodeTypeCategory().nodeType("principledshader::2.0") else "principledshader"
+    shader_type = _first_available(_mat_type, ("principledshader::2.0",), "principledshader")
     mat = _get_or_create(matnet, shader_type, "ship_mat")
 
     # Base color texture
@@ -524,60 +656,94 @@ def setup_interstellar_ai(
 
     import hou  # type: ignore
 
-    # Build geometry and details
-    nodes = _create_spaceship_blockout(prompt_tweaks=prompt_tweaks)
-    # Optionally add cockpit
-    cockpit_nodes = None
-    if cockpit_style:
-        cockpit_nodes = _add_cockpit(nodes["obj"], style_prompt=cockpit_style)
-
-    # Camera and simple lights for a quick snapshot
-    cam = _create_camera_and_lights()
-
-    # Paths
-    project_root = Path(hou.expandString("$HIP")) if hou.expandString("$HIP") else Path.cwd()
-    ai_dir = project_root / "ai_tools" / "generated"
-    snapshot_path = ai_dir / "ship_view.png"
-    texture_path = ai_dir / "ship_texture.png"
-    cockpit_snapshot_path = ai_dir / "cockpit_view.png"
-    cockpit_texture_path = ai_dir / "cockpit_texture.png"
-
-    # Quick snapshot render (best effort)
-    snapshot_ok = _render_viewport_snapshot(
-        output_path=snapshot_path,
-        camera_path=cam.path(),
-        objects_path=nodes["geo"].path(),
-    )
-
-    # Call SD (prefers img2img when snapshot is available)
-    sd_ok = _call_stable_diffusion(
-        init_image=snapshot_path if snapshot_ok else None,
-        prompt=prompt,
-        output_image=texture_path,
-        api_url=sd_api_url,
-    )
-
-    # Cockpit-specific texture (if cockpit exists)
-    if cockpit_nodes is not None:
-        cockpit_cam = cockpit_nodes["camera"]
-        cockpit_snapshot_ok = _render_viewport_snapshot(
-            output_path=cockpit_snapshot_path,
-            camera_path=cockpit_cam.path(),
-            objects_path=cockpit_nodes["geo"].path(),
-        )
-        cockpit_ok = _call_stable_diffusion(
-            init_image=cockpit_snapshot_path if cockpit_snapshot_ok else None,
-            prompt=cockpit_style or "retro-futuristic cockpit with neon holograms",
-            output_image=cockpit_texture_path,
-            api_url=sd_api_url,
-        )
+    # Scene containers, resolved once for the whole run
+    obj = hou.node("/obj")
+    out = hou.node("/out")
+    matnet = hou.node("/mat") or hou.node("/").createNode("matnet", node_name="mat")
+
+    # Scripted build: no undo snapshots, and no cooks until the network is wired
+    with batched_edits():
+        # Build geometry and details
+        nodes = _create_spaceship_blockout(obj, prompt_tweaks=prompt_tweaks, sd_enabled=bool(sd_api_url))
+        # Optionally add cockpit
+        cockpit_nodes = None
+        if cockpit_style:
+            cockpit_nodes = _add_cockpit(obj, style_prompt=cockpit_style)
+
+        # Camera and simple lights for a quick snapshot
+        cam = _create_camera_and_lights(obj)
+
+        # Everything is wired; flag the outputs in one pass before any render reads them
+        flags = list(nodes["flags"])
+        if cockpit_nodes is not None:
+            flags += cockpit_nodes["flags"]
+        _apply_flags(flags)
+
+        # Paths (only needed when an SD server is configured)
+        texture_path = cockpit_texture_path = None
+        if sd_api_url:
+            hip = hou.expandString("$HIP")
+            ai_dir = (Path(hip) if hip else Path.cwd()) / "ai_tools" / "generated"
+            ai_dir.mkdir(parents=True, exist_ok=True)
+            snapshot_path = ai_dir / "ship_view.png"
+            texture_path = ai_dir / "ship_texture.png"
+
+        # SD calls are network-bound and run on worker threads, so the ship
+        # request is already in flight while the cockpit snapshot renders.
+        sd_ok = cockpit_ok = False
+        if sd_api_url and prompt_tweaks and "rivet" in prompt_tweaks.lower():
+            prompt = f"{prompt}, {_RIVET_PROMPT}"
+        if sd_api_url:
+            session = _sd_session()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+                # Quick snapshot render (best effort); SD prefers img2img when it succeeds
+                snapshot_ok = _render_viewport_snapshot(
+                    out,
+                    output_path=snapshot_path,
+                    camera_path=cam.path(),
+                    objects_path=nodes["geo"].path(),
+                    res=_SD_RES,
+                )
+                ship_future = pool.submit(
+                    _call_stable_diffusion,
+                    snapshot_path if snapshot_ok else None,
+                    prompt,
+                    texture_path,
+                    sd_api_url,
+                    session,
+                )
+
+                # Cockpit-specific texture (if cockpit exists)
+                cockpit_future = None
+                if cockpit_nodes is not None:
+                    cockpit_snapshot_path = ai_dir / "cockpit_view.png"
+                    cockpit_texture_path = ai_dir / "cockpit_texture.png"
+                    cockpit_snapshot_ok = _render_viewport_snapshot(
+                        out,
+                        output_path=cockpit_snapshot_path,
+                        camera_path=cockpit_nodes["camera"].path(),
+                        objects_path=cockpit_nodes["geo"].path(),
+                        res=_SD_RES,
+                    )
+                    cockpit_future = pool.submit(
+                        _call_stable_diffusion,
+                        cockpit_snapshot_path if cockpit_snapshot_ok else None,
+                        cockpit_style or "retro-futuristic cockpit with neon holograms",
+                        cockpit_texture_path,
+                        sd_api_url,
+                        session,
+                    )
+
+                sd_ok = ship_future.result()
+                cockpit_ok = cockpit_future.result() if cockpit_future is not None else False
+
         # Optionally hook up StableHoudini PDG for further iterations
-        if build_stablehoudini_pdg:
-            _try_stablehoudini_pdg(cockpit_nodes["geo"].path())
+        if cockpit_nodes is not None and build_stablehoudini_pdg:
+            _try_stablehoudini_pdg(obj, cockpit_nodes["geo"].path())
 
-    # Create/assign material
-    mat = _create_or_update_material(texture_path if sd_ok else None)
-    _assign_material_to_geo(mat.path(), nodes["mat_sop"])
+        # Create/assign material
+        mat = _create_or_update_material(matnet, texture_path if sd_ok else None)
+        _assign_material_to_geo(mat.path(), nodes["mat_sop"])
 
     print("[Interstellar] Setup complete.")
     if sd_ok:
@@ -586,7 +752,7 @@ def setup_interstellar_ai(
         print("[Interstellar] AI texture step skipped or failed; using default shader settings.")
 
     if cockpit_nodes is not None:
-        if cockpit_texture_path.exists():
+        if cockpit_ok:
             print(f"[Interstellar] Applied cockpit AI texture: {cockpit_texture_path}")
         else:
             print("[Interstellar] Cockpit AI texture step skipped or failed.")